@@ -4,10 +4,16 @@ Simple Working Backend for Vegetation Management Agent
 This is a basic, reliable version that will start without issues
 """
 
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Header, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-from typing import List, Dict, Optional
+from sortedcontainers import SortedList
+from typing import Callable, List, Dict, Optional, Union
+from collections import Counter, OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from fractions import Fraction
+import hashlib
+import math
 import random
 import json
 import time
@@ -21,6 +27,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Last-Modified", "Content-Location"],
 )
 
 # Data models
@@ -33,10 +40,166 @@ class VegetationRequest(BaseModel):
 class KMLRequest(BaseModel):
     kml_content: str
 
-# Cache for storing results
-vegetation_cache = {}
-risk_cache = {}
-growth_cache = {}
+class LineStateRequest(BaseModel):
+    vegetation_data: List[Dict]
+
+class VegetationPatch(BaseModel):
+    upsert: List[Dict] = []
+    delete: List[Union[str, int]] = []
+
+# Results are content-addressed: the same request always produces the same
+# bytes on every worker, so the ETag can be derived from the request alone.
+# Bump RESULTS_VERSION whenever the generation logic changes so that clients
+# drop their stored copies.
+RESULTS_VERSION = "1"
+RESULTS_CACHE_SIZE = 256
+
+# Cache for storing serialized results and the time they were computed,
+# keyed by request digest
+vegetation_cache = OrderedDict()
+risk_cache = OrderedDict()
+growth_cache = OrderedDict()
+map_cache = OrderedDict()
+RESULT_CACHES = (vegetation_cache, risk_cache, growth_cache, map_cache)
+line_cache = OrderedDict()
+
+RISK_LEVEL_RANK = {"Critical": 3, "High": 2, "Medium": 1, "Low": 0}
+
+class LineState:
+    """Server-held vegetation points for one line with running aggregates.
+
+    Every insert, update or delete adjusts the level counts, cost and risk
+    sums and the content hash in O(1), and the maintenance schedule (a
+    SortedList) in O(log n), instead of re-assessing the whole line. Sums are
+    kept as exact fractions so the result does not depend on the order of
+    updates and matches a line loaded from scratch byte for byte.
+    """
+
+    def __init__(self, line_id: str):
+        self.line_id = line_id
+        self.points = {}
+        self.level_counts = Counter()
+        self.total_cost = Fraction(0)
+        self.risk_sum = Fraction(0)
+        self.schedule = SortedList()
+        self.content_hash = 0
+        self.touch()
+
+    @staticmethod
+    def schedule_key(point: Dict) -> tuple:
+        """Most urgent first: risk level, then risk score, then id"""
+        return (-RISK_LEVEL_RANK.get(point['riskLevel'], -1), -point['riskScore'], point['id'])
+
+    @staticmethod
+    def prepare_point(point: Dict) -> tuple:
+        """Validate a point and hash it; raises KeyError/ValueError/TypeError.
+
+        Everything that can fail happens here, so add_point cannot leave the
+        state half-updated.
+        """
+        point = {**validate_vegetation_point(point), 'id': str(point['id'])}
+        canonical = json.dumps(point, sort_keys=True, separators=(",", ":"))
+        return point, int(hashlib.sha256(canonical.encode("utf-8")).hexdigest(), 16)
+
+    def add_point(self, prepared: tuple):
+        point, point_hash = prepared
+        self.points[point['id']] = (point, point_hash)
+        self.level_counts[point['riskLevel']] += 1
+        self.total_cost += Fraction(point['estimatedCost'])
+        self.risk_sum += Fraction(point['riskScore'])
+        self.schedule.add(self.schedule_key(point))
+        self.content_hash = (self.content_hash + point_hash) % (1 << 256)
+
+    def remove_point(self, point_id: str) -> bool:
+        entry = self.points.pop(point_id, None)
+        if entry is None:
+            return False
+        point, point_hash = entry
+        self.level_counts[point['riskLevel']] -= 1
+        self.total_cost -= Fraction(point['estimatedCost'])
+        self.risk_sum -= Fraction(point['riskScore'])
+        self.schedule.remove(self.schedule_key(point))
+        self.content_hash = (self.content_hash - point_hash) % (1 << 256)
+        return True
+
+    def touch(self):
+        """Advance last_modified by at least a whole second.
+
+        Last-Modified is sent in whole seconds, so the stored value is too;
+        stepping past the previous value (kept per line id, even across a
+        DELETE and re-PUT) means no change can hide behind a 304.
+        """
+        self.last_modified = max(math.ceil(time.time()), line_clock.get(self.line_id, 0) + 1)
+        line_clock[self.line_id] = self.last_modified
+
+    def check_patch(self, delete: List[str], upsert: List[tuple]):
+        """Raise ValueError if the patch would push the totals out of float range"""
+        changes = dict.fromkeys(delete)
+        changes.update((point['id'], point) for point, _ in upsert)
+
+        total_cost, risk_sum, count = self.total_cost, self.risk_sum, len(self.points)
+        for point_id, point in changes.items():
+            if point_id in self.points:
+                old_point = self.points[point_id][0]
+                total_cost -= Fraction(old_point['estimatedCost'])
+                risk_sum -= Fraction(old_point['riskScore'])
+                count -= 1
+            if point is not None:
+                total_cost += Fraction(point['estimatedCost'])
+                risk_sum += Fraction(point['riskScore'])
+                count += 1
+        self.check_totals(total_cost, risk_sum, count)
+
+    @staticmethod
+    def check_totals(total_cost: Fraction, risk_sum: Fraction, count: int):
+        try:
+            float(total_cost)
+            if count:
+                float(risk_sum / count)
+        except OverflowError:
+            raise ValueError("total estimatedCost is out of range")
+
+    def digest(self, endpoint: str, *extra) -> str:
+        """Content address of the current state, identical on every worker"""
+        return request_digest(endpoint, [self.line_id, f"{self.content_hash:064x}", *extra])
+
+    def risk_analysis(self) -> Dict:
+        """Same shape as calculate_risk_assessment, read from the aggregates"""
+        if not self.points:
+            return {"error": "No vegetation data provided"}
+
+        return {
+            "critical_risks": self.level_counts['Critical'],
+            "high_risks": self.level_counts['High'],
+            "medium_risks": self.level_counts['Medium'],
+            "low_risks": self.level_counts['Low'],
+            "total_cost": float(self.total_cost),
+            "average_risk_score": float(self.risk_sum / len(self.points)),
+            "total_vegetation_points": len(self.points)
+        }
+
+    def maintenance_schedule(self, limit: Optional[int] = None) -> List[Dict]:
+        """Points in the order crews should work them"""
+        keys = self.schedule if limit is None else self.schedule.islice(0, limit)
+        schedule = []
+        for key in keys:
+            point = self.points[key[2]][0]
+            schedule.append({
+                "id": point['id'],
+                "riskLevel": point['riskLevel'],
+                "riskScore": point['riskScore'],
+                "priority": point.get('priority'),
+                "estimatedCost": point['estimatedCost']
+            })
+        return schedule
+
+# Per-line state for incremental re-assessment, keyed by line_id. This lives
+# in process memory and is not shared, so the /lines endpoints need the
+# server to run as a single worker (as render.yaml does); with several
+# workers a PUT and a later PATCH could land on different processes.
+line_states = {}
+# Last-Modified seconds per line_id, kept after a line is deleted
+line_clock = {}
 
 @app.get("/")
 async def root():
@@ -47,50 +210,68 @@ async def health_check():
     return {"status": "healthy", "timestamp": time.time()}
 
 @app.post("/detect_vegetation")
-async def detect_vegetation(request: VegetationRequest):
+async def detect_vegetation(request: VegetationRequest,
+                            if_none_match: Optional[str] = Header(None)):
     """Detect vegetation along power lines"""
     try:
-        # Generate vegetation data based on line characteristics
-        vegetation_data = generate_vegetation_data(request.line_id, request.line_data)
-        
-        return {
-            "vegetation_data": vegetation_data,
-            "total_points": len(vegetation_data),
-            "line_id": request.line_id
-        }
+        digest = request_digest("detect_vegetation", request.model_dump())
+
+        def build():
+            # Generate vegetation data based on line characteristics
+            rng = random.Random(int(digest, 16))
+            vegetation_data = generate_vegetation_data(request.line_id, request.line_data, rng)
+            return {
+                "vegetation_data": vegetation_data,
+                "total_points": len(vegetation_data),
+                "line_id": request.line_id
+            }
+
+        return conditional_response(vegetation_cache, digest, build, if_none_match)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/assess_risk")
-async def assess_risk(request: Dict):
+async def assess_risk(request: Dict, http_request: Request,
+                      if_none_match: Optional[str] = Header(None)):
     """Assess risk of vegetation interference"""
     try:
-        vegetation_data = request.get("vegetation_data", [])
-        risk_analysis = calculate_risk_assessment(vegetation_data)
-        
-        return {
-            "risk_analysis": risk_analysis,
-            "assessment_timestamp": time.time()
-        }
+        vegetation_data = [validate_vegetation_point(v) for v in request.get("vegetation_data", [])]
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid vegetation data: {e}")
+
+    try:
+        # Assessing the points costs about as much as validating them, so a
+        # conditional POST saves little here; the digest is for cross-worker
+        # ETags and GET /results. Hash the raw body rather than re-serializing.
+        digest = body_digest("assess_risk", await http_request.body())
+        return conditional_response(risk_cache, digest,
+                                    lambda: {"risk_analysis": calculate_risk_assessment(vegetation_data)},
+                                    if_none_match)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/predict_growth")
-async def predict_growth(request: Dict):
+async def predict_growth(request: Dict, http_request: Request,
+                         if_none_match: Optional[str] = Header(None)):
     """Predict vegetation growth patterns"""
+    vegetation_data = request.get("vegetation_data", [])
+    if not isinstance(vegetation_data, list):
+        raise HTTPException(status_code=400, detail="Invalid vegetation data: expected a list")
+
     try:
-        vegetation_data = request.get("vegetation_data", [])
-        growth_prediction = generate_growth_prediction(vegetation_data)
-        
-        return {
-            "growth_prediction": growth_prediction,
-            "prediction_timestamp": time.time()
-        }
+        digest = body_digest("predict_growth", await http_request.body())
+
+        def build():
+            rng = random.Random(int(digest, 16))
+            return {"growth_prediction": generate_growth_prediction(vegetation_data, rng)}
+
+        return conditional_response(growth_cache, digest, build, if_none_match)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.post("/process_kml")
-async def process_kml(request: KMLRequest):
+async def process_kml(request: KMLRequest,
+                      if_none_match: Optional[str] = Header(None)):
     """Process KML file and generate map configuration"""
     try:
         # Simple KML processing without external dependencies
@@ -106,45 +287,53 @@ async def process_kml(request: KMLRequest):
         if not coordinates:
             raise HTTPException(status_code=400, detail="No coordinates found in KML")
         
-        # Calculate simple bounds
-        bounds = calculate_simple_bounds(coordinates)
-        center_lat = (bounds['min_lat'] + bounds['max_lat']) / 2
-        center_lon = (bounds['min_lon'] + bounds['max_lon']) / 2
-        
-        # Determine zoom level
-        lat_span = bounds['max_lat'] - bounds['min_lat']
-        lon_span = bounds['max_lon'] - bounds['min_lon']
-        max_span = max(lat_span, lon_span)
-        
-        if max_span > 10:
-            zoom_level = 5
-        elif max_span > 5:
-            zoom_level = 6
-        elif max_span > 2:
-            zoom_level = 7
-        elif max_span > 1:
-            zoom_level = 8
-        elif max_span > 0.5:
-            zoom_level = 9
-        else:
-            zoom_level = 10
-        
-        return {
-            "success": True,
-            "map_config": {
-                "center_lat": center_lat,
-                "center_lon": center_lon,
-                "zoom_level": zoom_level,
-                "bounds": bounds
-            },
-            "lines_data": [{"name": "KML Line", "coordinates": coordinates}],
-            "total_lines": 1,
-            "total_coordinates": len(coordinates)
-        }
-        
+        digest = request_digest("process_kml", coordinates)
+        return conditional_response(map_cache, digest,
+                                    lambda: build_map_data(coordinates),
+                                    if_none_match)
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def build_map_data(coordinates: List[Dict[str, float]]) -> Dict:
+    """Build the map configuration for KML coordinates"""
+    # Calculate simple bounds
+    bounds = calculate_simple_bounds(coordinates)
+    center_lat = (bounds['min_lat'] + bounds['max_lat']) / 2
+    center_lon = (bounds['min_lon'] + bounds['max_lon']) / 2
+    
+    # Determine zoom level
+    lat_span = bounds['max_lat'] - bounds['min_lat']
+    lon_span = bounds['max_lon'] - bounds['min_lon']
+    max_span = max(lat_span, lon_span)
+    
+    if max_span > 10:
+        zoom_level = 5
+    elif max_span > 5:
+        zoom_level = 6
+    elif max_span > 2:
+        zoom_level = 7
+    elif max_span > 1:
+        zoom_level = 8
+    elif max_span > 0.5:
+        zoom_level = 9
+    else:
+        zoom_level = 10
+    
+    return {
+        "success": True,
+        "map_config": {
+            "center_lat": center_lat,
+            "center_lon": center_lon,
+            "zoom_level": zoom_level,
+            "bounds": bounds
+        },
+        "lines_data": [{"name": "KML Line", "coordinates": coordinates}],
+        "total_lines": 1,
+        "total_coordinates": len(coordinates)
+    }
+
 @app.post("/validate_kml")
 async def validate_kml(request: KMLRequest):
     """Validate KML file format and content"""
@@ -184,7 +373,250 @@ async def validate_kml(request: KMLRequest):
             "error_message": str(e)
         }
 
+@app.get("/results/{digest}")
+async def get_result(digest: str, if_none_match: Optional[str] = Header(None)):
+    """Fetch a POST result by the digest from its ETag / Content-Location"""
+    entry = next((cache[digest] for cache in RESULT_CACHES if digest in cache), None)
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+    # The digest names the content, so a client holding this ETag is current
+    # on every worker; only "*" needs the result to exist here
+    if if_none_match is not None and etag_matches(if_none_match, etag):
+        if entry is not None or if_none_match.strip() != "*":
+            return Response(status_code=304, headers=headers)
+
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Result not cached on this worker; repeat the POST")
+
+    headers["Last-Modified"] = formatdate(entry[1], usegmt=True)
+    return Response(content=entry[0], media_type="application/json", headers=headers)
+
+@app.put("/lines/{line_id}")
+async def load_line(line_id: str, request: LineStateRequest):
+    """Load the full vegetation data for a line, replacing any held state"""
+    try:
+        state = LineState(line_id)
+        for prepared in map(LineState.prepare_point, request.vegetation_data):
+            if prepared[0]['id'] in state.points:
+                raise ValueError(f"Duplicate vegetation point id: {prepared[0]['id']}")
+            state.add_point(prepared)
+        state.check_totals(state.total_cost, state.risk_sum, len(state.points))
+
+        # Build the response before storing, so a failure keeps the previous state
+        response = {
+            "line_id": line_id,
+            "total_points": len(state.points),
+            "risk_analysis": state.risk_analysis()
+        }
+        line_states[line_id] = state
+        return response
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid vegetation point: {e}")
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.patch("/lines/{line_id}/vegetation")
+async def patch_line_vegetation(line_id: str, request: VegetationPatch):
+    """Insert, update or delete vegetation points and update the line aggregates"""
+    state = get_line_state(line_id)
+    try:
+        # Validate every upsert and the resulting totals before touching the
+        # state, so a rejected patch leaves the line exactly as it was
+        delete = [str(point_id) for point_id in request.delete]
+        upsert = [LineState.prepare_point(point) for point in request.upsert]
+        state.check_patch(delete, upsert)
+    except (KeyError, TypeError, ValueError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid vegetation point: {e}")
+
+    try:
+        deleted = sum(1 for point_id in delete if state.remove_point(point_id))
+        inserted = updated = 0
+        for prepared in upsert:
+            if state.remove_point(prepared[0]['id']):
+                updated += 1
+            else:
+                inserted += 1
+            state.add_point(prepared)
+        if inserted or updated or deleted:
+            state.touch()
+
+        return {
+            "line_id": line_id,
+            "inserted": inserted,
+            "updated": updated,
+            "deleted": deleted,
+            "total_points": len(state.points),
+            "risk_analysis": state.risk_analysis()
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.delete("/lines/{line_id}")
+async def delete_line(line_id: str):
+    """Drop the held state for a line"""
+    get_line_state(line_id)
+    del line_states[line_id]
+    return {"line_id": line_id, "deleted": True}
+
+@app.get("/lines/{line_id}/risk")
+async def line_risk(line_id: str,
+                    if_none_match: Optional[str] = Header(None),
+                    if_modified_since: Optional[str] = Header(None)):
+    """Risk assessment for a held line, read from its running aggregates"""
+    state = get_line_state(line_id)
+    try:
+        return conditional_response(line_cache, state.digest("line_risk"),
+                                    lambda: {"risk_analysis": state.risk_analysis()},
+                                    if_none_match, if_modified_since,
+                                    last_modified=state.last_modified, safe_method=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/lines/{line_id}/growth")
+async def line_growth(line_id: str,
+                      if_none_match: Optional[str] = Header(None),
+                      if_modified_since: Optional[str] = Header(None)):
+    """Growth prediction for a held line"""
+    state = get_line_state(line_id)
+    try:
+        # The prediction is seeded from the line alone and does not read the
+        # points, so neither the body nor its ETag changes when points are patched
+        digest = request_digest("line_growth", line_id)
+
+        def build():
+            rng = random.Random(int(digest, 16))
+            return {"growth_prediction": generate_growth_prediction([], rng)}
+
+        return conditional_response(line_cache, digest, build,
+                                    if_none_match, if_modified_since,
+                                    last_modified=state.last_modified, safe_method=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.get("/lines/{line_id}/schedule")
+async def line_schedule(line_id: str, limit: Optional[int] = Query(None, ge=1),
+                        if_none_match: Optional[str] = Header(None),
+                        if_modified_since: Optional[str] = Header(None)):
+    """Maintenance schedule for a held line, most urgent points first"""
+    state = get_line_state(line_id)
+    try:
+        return conditional_response(line_cache, state.digest("line_schedule", limit),
+                                    lambda: {
+                                        "line_id": line_id,
+                                        "maintenance_schedule": state.maintenance_schedule(limit),
+                                        "total_points": len(state.points)
+                                    },
+                                    if_none_match, if_modified_since,
+                                    last_modified=state.last_modified, safe_method=True)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 # Helper functions
+def get_line_state(line_id: str) -> LineState:
+    """Look up held line state or fail with 404"""
+    state = line_states.get(line_id)
+    if state is None:
+        raise HTTPException(status_code=404, detail=f"No state held for line {line_id}")
+    return state
+
+def request_digest(endpoint: str, payload) -> str:
+    """Content address of a request: identical inputs give identical digests"""
+    canonical = json.dumps([RESULTS_VERSION, endpoint, payload],
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def body_digest(endpoint: str, body: bytes) -> str:
+    """Content address of a raw request body, for payloads too large to re-serialize"""
+    prefix = f"{RESULTS_VERSION}:{endpoint}:".encode("utf-8")
+    return hashlib.sha256(prefix + body).hexdigest()
+
+def serialize_result(result: Dict) -> bytes:
+    """Serialize a result the same way on every worker"""
+    return json.dumps(result, ensure_ascii=False, allow_nan=False,
+                      separators=(",", ":")).encode("utf-8")
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an ETag"""
+    if if_none_match.strip() == "*":
+        return True
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def not_modified_since(if_modified_since: str, last_modified: float) -> bool:
+    """Check an If-Modified-Since header against a modification time"""
+    try:
+        return parsedate_to_datetime(if_modified_since).timestamp() >= last_modified
+    except (TypeError, ValueError, IndexError):
+        return False
+
+def conditional_response(cache: OrderedDict, digest: str, build: Callable[[], Dict],
+                         if_none_match: Optional[str] = None,
+                         if_modified_since: Optional[str] = None,
+                         last_modified: Optional[float] = None,
+                         safe_method: bool = False) -> Response:
+    """Serve a content-addressed result, skipping the build when the client's copy is current.
+
+    As RFC 9110 requires, a matching If-None-Match gets 304 on GET and 412 on
+    other methods, and If-Modified-Since is only honoured on GET. POST results
+    carry a Content-Location under /results so clients can revalidate them
+    with a GET. Callers must validate the payload before calling this.
+    Without an explicit last_modified, Last-Modified is the time this worker
+    computed the result.
+    """
+    entry = cache.get(digest)
+    if last_modified is None and entry is not None:
+        last_modified = entry[1]
+
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    if not safe_method:
+        headers["Content-Location"] = f"/results/{digest}"
+
+    # If-None-Match takes precedence over If-Modified-Since
+    if if_none_match is not None:
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304 if safe_method else 412, headers=headers)
+    elif (safe_method and if_modified_since is not None and last_modified is not None
+            and not_modified_since(if_modified_since, last_modified)):
+        return Response(status_code=304, headers=headers)
+
+    if entry is None:
+        body = serialize_result(build())
+        computed_at = time.time()
+        cache[digest] = (body, computed_at)
+        if len(cache) > RESULTS_CACHE_SIZE:
+            cache.popitem(last=False)
+        headers.setdefault("Last-Modified", formatdate(computed_at, usegmt=True))
+    else:
+        body = entry[0]
+        cache.move_to_end(digest)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
+def validate_vegetation_point(point: Dict) -> Dict:
+    """Check the fields risk assessment relies on and return a normalized copy"""
+    if not isinstance(point, dict):
+        raise TypeError("vegetation point must be an object")
+
+    normalized = {**point, 'riskLevel': str(point['riskLevel'])}
+    for field in ('riskScore', 'estimatedCost'):
+        try:
+            value = float(point[field])
+        except OverflowError:
+            raise ValueError(f"{field} is out of range")
+        if not math.isfinite(value):
+            raise ValueError(f"{field} must be a finite number")
+        normalized[field] = value
+    return normalized
+
 def extract_coordinates_simple(kml_content: str) -> List[Dict[str, float]]:
     """Extract coordinates from KML content (simplified)"""
     coordinates = []
@@ -231,8 +663,10 @@ def calculate_simple_bounds(coordinates: List[Dict[str, float]]) -> Dict[str, fl
         'max_lon': max(lons)
     }
 
-def generate_vegetation_data(line_id: str, line_data: Dict) -> List[Dict]:
+def generate_vegetation_data(line_id: str, line_data: Dict,
+                             rng: Optional[random.Random] = None) -> List[Dict]:
     """Generate vegetation data for a power line"""
+    rng = rng or random.Random()
     vegetation_points = []
     
     # Determine vegetation density based on line characteristics
@@ -252,13 +686,13 @@ def generate_vegetation_data(line_id: str, line_data: Dict) -> List[Dict]:
     for i in range(base_count):
         vegetation_points.append({
             "id": f"VEG_{line_id}_{i:03d}",
-            "type": random.choice(["Oak", "Pine", "Maple", "Birch", "Cedar"]),
-            "height": random.uniform(5, 25),
-            "distance": random.uniform(5, 50),
-            "riskScore": random.uniform(0.1, 0.9),
-            "riskLevel": random.choice(["Low", "Medium", "High", "Critical"]),
-            "priority": random.choice(["Low", "Medium", "High", "Immediate"]),
-            "estimatedCost": random.uniform(1000, 5000)
+            "type": rng.choice(["Oak", "Pine", "Maple", "Birch", "Cedar"]),
+            "height": rng.uniform(5, 25),
+            "distance": rng.uniform(5, 50),
+            "riskScore": rng.uniform(0.1, 0.9),
+            "riskLevel": rng.choice(["Low", "Medium", "High", "Critical"]),
+            "priority": rng.choice(["Low", "Medium", "High", "Immediate"]),
+            "estimatedCost": rng.uniform(1000, 5000)
         })
     
     return vegetation_points
@@ -286,8 +720,10 @@ def calculate_risk_assessment(vegetation_data: List[Dict]) -> Dict:
         "total_vegetation_points": len(vegetation_data)
     }
 
-def generate_growth_prediction(vegetation_data: List[Dict]) -> Dict:
+def generate_growth_prediction(vegetation_data: List[Dict],
+                               rng: Optional[random.Random] = None) -> Dict:
     """Generate growth prediction for vegetation"""
+    rng = rng or random.Random()
     months = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 
               'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
     
@@ -295,9 +731,9 @@ def generate_growth_prediction(vegetation_data: List[Dict]) -> Dict:
     for month in months:
         predictions.append({
             "month": month,
-            "growth_rate": random.uniform(0.1, 0.3),
-            "risk_increase": random.uniform(0.05, 0.2),
-            "maintenance_needed": random.choice([True, False])
+            "growth_rate": rng.uniform(0.1, 0.3),
+            "risk_increase": rng.uniform(0.05, 0.2),
+            "maintenance_needed": rng.choice([True, False])
         })
     
     return {
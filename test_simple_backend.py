@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""
+Tests for the Simple Backend API
+Runs the FastAPI app in-process with TestClient, no server needed
+"""
+
+import importlib.util
+import os
+
+import pytest
+from fastapi.testclient import TestClient
+
+BACKEND_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "simple_backend.py")
+
+LINE_REQUEST = {
+    "line_id": "L1",
+    "line_data": {"line_type": "transmission", "region": "Rural"},
+    "coordinates": [],
+    "line_type": "transmission"
+}
+
+KML_CONTENT = "<kml><Placemark><coordinates>-122.4,37.7 -122.5,37.8</coordinates></Placemark></kml>"
+
+def load_backend(name: str):
+    """Import a fresh copy of the backend, as a separate worker would"""
+    spec = importlib.util.spec_from_file_location(name, BACKEND_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+@pytest.fixture
+def backend():
+    return load_backend("backend_under_test")
+
+@pytest.fixture
+def client(backend):
+    return TestClient(backend.app)
+
+def test_results_identical_across_fresh_apps():
+    first = TestClient(load_backend("backend_worker_a").app)
+    second = TestClient(load_backend("backend_worker_b").app)
+
+    vegetation = first.post("/detect_vegetation", json=LINE_REQUEST)
+    requests_by_endpoint = [
+        ("/detect_vegetation", LINE_REQUEST),
+        ("/assess_risk", {"vegetation_data": vegetation.json()["vegetation_data"]}),
+        ("/predict_growth", {"vegetation_data": vegetation.json()["vegetation_data"]}),
+        ("/process_kml", {"kml_content": KML_CONTENT})
+    ]
+    for endpoint, payload in requests_by_endpoint:
+        a = first.post(endpoint, json=payload)
+        b = second.post(endpoint, json=payload)
+        assert a.status_code == b.status_code == 200
+        assert a.headers["etag"] == b.headers["etag"]
+        assert a.content == b.content
+
+def test_matching_etag_on_post_is_precondition_failed(client):
+    response = client.post("/process_kml", json={"kml_content": KML_CONTENT})
+    etag = response.headers["etag"]
+
+    repeat = client.post("/process_kml", json={"kml_content": KML_CONTENT},
+                         headers={"If-None-Match": etag})
+    assert repeat.status_code == 412
+    assert repeat.headers["etag"] == etag
+    assert repeat.content == b""
+
+    other = client.post("/process_kml", json={"kml_content": KML_CONTENT},
+                        headers={"If-None-Match": '"stale"'})
+    assert other.status_code == 200
+    assert other.content == response.content
+
+def test_conditional_hits_skip_build_and_serialization(backend, client, monkeypatch):
+    calls = {"build": 0, "serialize": 0}
+    generate, serialize = backend.generate_vegetation_data, backend.serialize_result
+
+    def counting_generate(*args):
+        calls["build"] += 1
+        return generate(*args)
+
+    def counting_serialize(result):
+        calls["serialize"] += 1
+        return serialize(result)
+
+    monkeypatch.setattr(backend, "generate_vegetation_data", counting_generate)
+    monkeypatch.setattr(backend, "serialize_result", counting_serialize)
+
+    response = client.post("/detect_vegetation", json=LINE_REQUEST)
+    etag, location = response.headers["etag"], response.headers["content-location"]
+    assert location == "/results/" + etag.strip('"')
+    assert calls == {"build": 1, "serialize": 1}
+
+    assert client.post("/detect_vegetation", json=LINE_REQUEST,
+                       headers={"If-None-Match": etag}).status_code == 412
+    assert client.get(location, headers={"If-None-Match": etag}).status_code == 304
+    assert client.get(location).content == response.content
+    assert client.post("/detect_vegetation", json=LINE_REQUEST).content == response.content
+    assert calls == {"build": 1, "serialize": 1}
+
+def test_results_endpoint_for_unknown_digest(client):
+    assert client.get("/results/abc").status_code == 404
+    assert client.get("/results/abc", headers={"If-None-Match": '"abc"'}).status_code == 304
+    assert client.get("/results/abc", headers={"If-None-Match": "*"}).status_code == 404
+
+def test_if_modified_since_ignored_on_post(client):
+    response = client.post("/process_kml", json={"kml_content": KML_CONTENT},
+                           headers={"If-Modified-Since": "Fri, 01 Jan 2100 00:00:00 GMT"})
+    assert response.status_code == 200
+    assert "last-modified" in response.headers
+
+def test_payload_validated_before_conditional_checks(client):
+    invalid_kml = client.post("/process_kml", json={"kml_content": "not kml"},
+                              headers={"If-None-Match": "*"})
+    assert invalid_kml.status_code == 400
+
+    invalid_points = client.post("/assess_risk", json={"vegetation_data": [{"id": "p1"}]},
+                                 headers={"If-None-Match": "*"})
+    assert invalid_points.status_code == 400
+
+def test_non_finite_risk_values_rejected(client):
+    body = '{"vegetation_data": [{"id": "p1", "riskLevel": "High", "riskScore": NaN, "estimatedCost": 1000.0}]}'
+    response = client.post("/assess_risk", content=body,
+                           headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+
+def test_out_of_range_risk_values_rejected(client):
+    body = '{"vegetation_data": [{"id": "p1", "riskLevel": "High", "riskScore": 1%s, "estimatedCost": 1.0}]}' % ("0" * 400)
+    response = client.post("/assess_risk", content=body,
+                           headers={"Content-Type": "application/json"})
+    assert response.status_code == 400
+
+def make_points(count: int):
+    levels = ["Low", "Medium", "High", "Critical"]
+    return [{
+        "id": f"P{i:03d}",
+        "type": "Oak",
+        "riskLevel": levels[i % 4],
+        "riskScore": round(0.1 + (i * 0.037) % 0.8, 3),
+        "priority": "High",
+        "estimatedCost": 1000.0 + i * 13.7
+    } for i in range(count)]
+
+def line_snapshot(client, line_id: str):
+    risk = client.get(f"/lines/{line_id}/risk")
+    schedule = client.get(f"/lines/{line_id}/schedule")
+    return risk.headers["etag"], risk.content, schedule.content
+
+def test_line_get_returns_304_on_matching_etag(client):
+    client.put("/lines/L1", json={"vegetation_data": make_points(10)})
+    response = client.get("/lines/L1/risk")
+    assert response.status_code == 200
+
+    repeat = client.get("/lines/L1/risk", headers={"If-None-Match": response.headers["etag"]})
+    assert repeat.status_code == 304
+    assert repeat.content == b""
+
+    unchanged = client.get("/lines/L1/risk", headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert unchanged.status_code == 304
+
+def test_line_if_modified_since_sees_patches(client):
+    client.put("/lines/L1", json={"vegetation_data": make_points(10)})
+    response = client.get("/lines/L1/risk")
+    client.patch("/lines/L1/vegetation", json={"delete": ["P000"]})
+
+    repeat = client.get("/lines/L1/risk", headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert repeat.status_code == 200
+    assert repeat.json()["risk_analysis"]["total_vegetation_points"] == 9
+
+def test_patch_matches_full_reload(client):
+    points = make_points(40)
+    client.put("/lines/L1", json={"vegetation_data": points})
+
+    updated = {**points[5], "riskLevel": "Low", "riskScore": 0.05, "estimatedCost": 250.0}
+    inserted = {**points[0], "id": "NEW", "riskLevel": "Critical", "riskScore": 0.95}
+    response = client.patch("/lines/L1/vegetation",
+                            json={"upsert": [updated, inserted], "delete": ["P010", "P011", "missing"]})
+    assert response.json()["inserted"] == 1
+    assert response.json()["updated"] == 1
+    assert response.json()["deleted"] == 2
+
+    remaining = [p for p in points if p["id"] not in ("P005", "P010", "P011")]
+    client.put("/lines/L2", json={"vegetation_data": [inserted] + remaining[::-1] + [updated]})
+
+    _, patched_risk, patched_schedule = line_snapshot(client, "L1")
+    _, reloaded_risk, reloaded_schedule = line_snapshot(client, "L2")
+    assert patched_risk == reloaded_risk
+    assert patched_schedule.replace(b'"L1"', b'"L2"') == reloaded_schedule
+
+def test_rejected_patch_leaves_state_unchanged(client):
+    points = make_points(10)
+    client.put("/lines/L1", json={"vegetation_data": points})
+    before = line_snapshot(client, "L1")
+
+    bad_patches = [
+        '{"upsert": [{"id": "P001", "riskLevel": "High", "riskScore": NaN, "estimatedCost": 1.0}], "delete": ["P002"]}',
+        '{"upsert": [{"id": "P003", "riskLevel": "High", "riskScore": 0.5, "estimatedCost": Infinity}]}',
+        '{"upsert": [{"id": "NEW", "riskLevel": "High", "riskScore": 0.5}], "delete": ["P004"]}'
+    ]
+    for body in bad_patches:
+        response = client.patch("/lines/L1/vegetation", content=body,
+                                headers={"Content-Type": "application/json"})
+        assert response.status_code == 400
+        assert line_snapshot(client, "L1") == before
+
+    client.patch("/lines/L1/vegetation", json={"delete": [p["id"] for p in points]})
+    assert client.get("/lines/L1/schedule").json()["maintenance_schedule"] == []
+
+def test_totals_out_of_float_range_rejected(client):
+    huge = {"id": "P000", "riskLevel": "High", "riskScore": 0.5, "estimatedCost": 1e308}
+    client.put("/lines/L1", json={"vegetation_data": [huge]})
+    before = line_snapshot(client, "L1")
+
+    response = client.patch("/lines/L1/vegetation", json={"upsert": [{**huge, "id": "P001"}]})
+    assert response.status_code == 400
+    assert line_snapshot(client, "L1") == before
+
+    response = client.put("/lines/L1", json={"vegetation_data": [huge, {**huge, "id": "P001"}]})
+    assert response.status_code == 400
+    assert line_snapshot(client, "L1") == before
+
+def test_integer_ids_accepted_for_delete(client):
+    points = [{**point, "id": i} for i, point in enumerate(make_points(3))]
+    client.put("/lines/L1", json={"vegetation_data": points})
+
+    response = client.patch("/lines/L1/vegetation", json={"delete": [1]})
+    assert response.status_code == 200
+    assert response.json()["deleted"] == 1
+
+def test_line_growth_stable_across_patches(client):
+    points = make_points(10)
+    client.put("/lines/L1", json={"vegetation_data": points})
+    before = client.get("/lines/L1/growth")
+
+    client.patch("/lines/L1/vegetation", json={"upsert": [{**points[0], "riskScore": 0.9}]})
+    after = client.get("/lines/L1/growth")
+    assert after.content == before.content
+    assert after.headers["etag"] == before.headers["etag"]